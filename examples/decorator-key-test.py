@@ -32,7 +32,7 @@ for key in keys:
     @keybow.on_release(key)
     def release_handler(key):
         print("Key {} released".format(key.number))
-        if key.rgb == [255, 0, 0]:
+        if key.rgb == (255, 0, 0):
             key.set_led(0, 255, 0)
         else:
             key.set_led(64, 64, 64)
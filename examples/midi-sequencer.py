@@ -157,7 +157,6 @@ class Sequencer(Keybow2040):
 
         for i in range(len(TRACK_KEYS)):
             track_key = self.keys[TRACK_KEYS[i]]
-            track_key.index = i
             self.track_keys.append(track_key)
 
         # These keys select and change the current track.
@@ -230,7 +229,7 @@ class Sequencer(Keybow2040):
             def step_select(key):
                 if self.tracks[self.current_track].active:
                     if not key.held:
-                        step = self.tracks[self.current_track].steps[key.index]
+                        step = self.tracks[self.current_track].steps[TRACK_KEYS.index(key.number)]
                         step.toggle()
                         if not step.active:
                             current_note = step.note
@@ -238,7 +237,7 @@ class Sequencer(Keybow2040):
                             step.note = DEFAULT_NOTE
                             step.velocity = DEFAULT_VELOCITY
                     else:
-                        self.steps_held.remove(key.index)
+                        self.steps_held.remove(TRACK_KEYS.index(key.number))
                         self.note_down.led_off()
                         self.note_up.led_off()
                         self.velocity_down.led_off()
@@ -250,7 +249,7 @@ class Sequencer(Keybow2040):
             @self.on_hold(key)
             def step_change(key):
                 if self.tracks[self.current_track].active:
-                    self.steps_held.append(key.index)
+                    self.steps_held.append(TRACK_KEYS.index(key.number))
                     self.note_down.set_led(*NOTE_DOWN_COLOUR)
                     self.note_up.set_led(*NOTE_UP_COLOUR)
                     self.velocity_down.set_led(*VELOCITY_DOWN_COLOUR)
@@ -46,106 +46,726 @@ For Pico RGB Keypad Base:
 
 """
 
+import gc
 import time
 
+try:
+    from supervisor import ticks_ms
+except ImportError:
+    # Older firmware, or not CircuitPython at all.
+    def ticks_ms():
+        return (time.monotonic_ns() // 1000000) & _TICKS_MAX
+
+# Timing is done in integer millisecond ticks, which wrap around every
+# 2**29 ms. Unlike `time.monotonic()` they never lose precision, however
+# long the board has been up, and they stay small ints so don't allocate.
+# Always compare them with `ticks_diff()`, which handles the wrap; it is
+# accurate for ticks up to about three days apart.
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
 class Keybow2040(object):
     """
     Represents a Keybow 2040 and hence a set of Key instances with
     associated LEDs and key behaviours.
 
     :param hardware: object representing a board hardware
+    :param event_queue_size: number of press/release events held in the
+        event queue before the oldest are overwritten
+    :param scan_rate: times per second `update()` scans the keys
+    :param led_rate: times per second `update()` updates the LEDs
     """
-    def __init__(self, hardware):
+    def __init__(self, hardware, event_queue_size=32, scan_rate=1000, led_rate=60):
+        self._mem_before = _mem_free()
         self.hardware = hardware
         self.keys = []
-        self.time_of_last_press = time.monotonic()
-        self.time_since_last_press = None
+        self._last_press_ticks = ticks_ms()
+        self._idle_ms = 0
         self.led_sleep_enabled = False
-        self.led_sleep_time = 60
+        self._led_sleep_ms = 60000
+        self._brightness = 1.0
+        self._gamma = 1.0
         self.sleeping = False
         self.was_asleep = False
-        self.last_led_states = None
+
+        # Every key's colour, three bytes (r, g, b) per key, and whether
+        # its LED is lit, a byte per key. Each key's `rgb` and `lit` are
+        # views into these.
+        num_keys = self.hardware.num_keys()
+        self._rgb = bytearray(num_keys * 3)
+        self._lit = bytearray(num_keys)
+        self._states = 0
+        self._active = 0
+
+        # Hold deadlines, one per key, with a bit set in `_holding` for
+        # each key that has one pending and the earliest in `_next_hold`.
+        self._hold_deadlines = [0] * self.hardware.num_keys()
+        self._holding = 0
+        self._next_hold = 0
+        self._last_scan = ticks_ms()
         # self.rotation = 0
 
-        for i in range(self.hardware.num_keys()):
-            _key = Key(i, self.hardware)
+        # How often, in ms, `update()` scans the keys and updates the LEDs,
+        # and the ticks at which each is next due.
+        self.scan_rate = scan_rate
+        self.led_rate = led_rate
+
+        # Ring buffer of key events, preallocated so that recording an
+        # event doesn't allocate. Each entry is a key number, with the top
+        # bit set for a press, and the tick it happened on.
+        if event_queue_size < 1:
+            raise ValueError("event_queue_size must be at least 1")
+        self._event_keys = bytearray(event_queue_size)
+        self._event_times = [0] * event_queue_size
+        self._event_head = 0
+        self._event_count = 0
+
+        # This scan's events, in the same form, for running the handlers.
+        # A key changes at most once per scan, so this never overflows,
+        # however small the queue is.
+        self._scan_events = bytearray(num_keys)
+
+        # Set while `run_async()` is running, so that async handlers can
+        # be started as tasks.
+        self._asyncio = None
+
+        # The running animation, if any, started with `animate()`.
+        self.animation = None
+
+        # Overlays drawn over the keys' own colours, bottom first, with a
+        # bit set in `_covered` for each key that a visible layer covers,
+        # and in `_recompose` for each key whose colour needs working out
+        # again before the LEDs are next updated.
+        self.layers = []
+        self._covered = 0
+        self._recompose = 0
+
+        # Scenes added with `add_scene()`, by name. Each is the keys'
+        # colours and lit flags, laid out like `_rgb` and `_lit`, the same
+        # colours in the display's pixel order, and the spare hardware
+        # frame holding them, if there was one free.
+        self._scenes = {}
+
+        # Spare hardware frames being played by `play()`.
+        self._playing = ()
+
+        # Switches the hardware has already debounced are taken as read:
+        # debouncing them again would also filter out a press and release
+        # that both landed between two scans, which such backends latch
+        # into a single scan's reading.
+        debounced = self.hardware.switches_debounced()
+        for i in range(num_keys):
+            _key = Key(i, self.hardware, self)
+            if debounced:
+                _key.debounce = 0
             self.keys.append(_key)
 
+        self._mem_after = _mem_free()
+
     def update(self):
         # Call this in each iteration of your while loop to update
-        # to update everything's state, e.g. `keybow.update()`
-
-        for _key in self.keys:
-            _key.update()
+        # to update everything's state, e.g. `keybow.update()`. The keys
+        # are scanned at up to `scan_rate` times a second and the LEDs
+        # updated at up to `led_rate` times a second, however fast the
+        # loop goes, so slow LED updates don't hold up the key scanning.
+
+        now = ticks_ms()
+
+        if ticks_diff(now, self._scan_timer[0]) >= 0:
+            _advance(self._scan_timer, now)
+            self.update_keys()
+
+        if ticks_diff(now, self._led_timer[0]) >= 0:
+            _advance(self._led_timer, now)
+            self.update_leds()
+
+    def update_keys(self):
+        # Scans the switches and updates the keys, running any press,
+        # release and hold functions. Called by `update()`, or on its own
+        # to scan the keys at a different rate to updating the LEDs.
+
+        # Take the time once for the whole scan.
+        update_time = ticks_ms()
+
+        # Read every switch in one go. Only keys whose switch disagrees
+        # with their debounced state, or that are still bouncing, need
+        # updating, so on an idle pad this is a single comparison.
+        states = self.hardware.read_mask()
+        dirty = (states ^ self._states) | self._active
+
+        count = 0
+        number = 0
+        while dirty:
+            if dirty & 1:
+                _key = self.keys[number]
+                bit = 1 << number
+
+                # A key that was idle wasn't updated on the scans in
+                # between, so debounce it from the previous scan rather
+                # than from its own last update.
+                if not self._active & bit:
+                    _key._last_update = self._last_scan
+
+                # Update the key and queue an event if it was pressed or
+                # released. A press schedules the key's hold deadline, and
+                # a release cancels it.
+                edge = _key.update((states >> number) & 1, update_time)
+                if edge:
+                    self._push_event(number, edge > 0, update_time)
+                    self._scan_events[count] = number | 0x80 if edge > 0 else number
+                    count += 1
+                    if edge > 0:
+                        self._schedule_hold(number, ticks_add(update_time, _key._hold_ms))
+                    else:
+                        self._holding &= ~bit
+
+                if _key.pressed:
+                    self._states |= bit
+                else:
+                    self._states &= ~bit
+
+                if _key.key_locked:
+                    self._active |= bit
+                else:
+                    self._active &= ~bit
+
+            dirty >>= 1
+            number += 1
+
+        self._last_scan = update_time
+
+        # Run the handlers for this scan's events, in the order they were
+        # queued.
+        for i in range(count):
+            self._dispatch(self._scan_events[i])
+
+        # Fire any holds whose deadline has passed.
+        if self._holding and ticks_diff(update_time, self._next_hold) > 0:
+            self._fire_holds(update_time)
 
         # Used to work out the sleep behaviour, by keeping track
         # of the time of the last key press.
         if self.any_pressed():
-            self.time_of_last_press = time.monotonic()
+            self._last_press_ticks = update_time
             self.sleeping = False
 
-        self.time_since_last_press = time.monotonic() - self.time_of_last_press
+        self._idle_ms = ticks_diff(update_time, self._last_press_ticks)
+
+    def update_leds(self):
+        # Updates the LEDs' sleep state and shows any changes to the LEDs
+        # since the last update. LEDs are drawn into a frame buffer and
+        # only sent to the hardware here, all at once. Called by
+        # `update()`, or on its own to update the LEDs at a different rate
+        # to scanning the keys.
+
+        # Draw the next frame of any animation that's due one. An
+        # animation that has finished hands the LEDs back to the keys.
+        if self.animation is not None and not self.sleeping:
+            if not self.animation._tick(self, ticks_ms()):
+                self.animate(None)
+
+        # Draw any keys whose layers have changed, unless an animation is
+        # drawing over them.
+        if self._recompose and self.animation is None:
+            self._composite()
 
         # If LED sleep is enabled, but not engaged, check if enough time
-        # has elapsed to engage sleep. If engaged, record the state of the
-        # LEDs, so it can be restored on wake.
+        # has elapsed to engage sleep. Sleep turns the LEDs off in the
+        # hardware and leaves the frame alone, so nothing needs saving.
         if self.led_sleep_enabled and not self.sleeping:
-            if time.monotonic() - self.time_of_last_press > self.led_sleep_time:
+            if self._idle_ms > self._led_sleep_ms:
                 self.sleeping = True
-                self.last_led_states = [k.rgb if k.lit else [0, 0, 0] for k in self.keys]
-                self.set_all(0, 0, 0)
+                self.hardware.sleep(True)
                 self.was_asleep = True
 
-        # If it was sleeping, but is no longer, then restore LED states.
+        # If it was sleeping, but is no longer, then turn the LEDs back on,
+        # as they were, or as they've been set while asleep.
         if not self.sleeping and self.was_asleep:
-            for k in range(len(self.keys)):
-                self.keys[k].set_led(*self.last_led_states[k])
+            self.hardware.sleep(False)
             self.was_asleep = False
 
+        self.hardware.show()
+
+    @property
+    def time_of_last_press(self):
+        # The `time.monotonic()` of the last scan that saw any key pressed.
+
+        return time.monotonic() - ticks_diff(ticks_ms(), self._last_press_ticks) / 1000
+
+    @property
+    def time_since_last_press(self):
+        # Seconds between the last key press and the last `update()`.
+
+        return self._idle_ms / 1000
+
+    @property
+    def scan_rate(self):
+        # Times per second `update()` scans the keys, or None to scan them
+        # on every call. Rates that don't divide into whole milliseconds
+        # are kept to on average, e.g. 600 scans every 1 or 2 ms by turns.
+
+        return self._scan_rate
+
+    @scan_rate.setter
+    def scan_rate(self, rate):
+        self._scan_rate = rate or None
+        self._scan_timer = _timer(rate)
+
+    @property
+    def led_rate(self):
+        # Times per second `update()` updates the LEDs, or None to update
+        # them on every call.
+
+        return self._led_rate
+
+    @led_rate.setter
+    def led_rate(self, rate):
+        self._led_rate = rate or None
+        self._led_timer = _timer(rate)
+
+    @property
+    def led_sleep_time(self):
+        # Seconds without a key press before the LEDs go to sleep.
+
+        return self._led_sleep_ms / 1000
+
+    @led_sleep_time.setter
+    def led_sleep_time(self, seconds):
+        self._led_sleep_ms = int(seconds * 1000)
+
+    def memory_report(self):
+        # Returns a `(before, after)` tuple of the free heap, in bytes, just
+        # before and just after this Keybow was set up, so the difference
+        # is how much memory it takes. Both are None where the `gc` module
+        # can't report free memory, i.e. anywhere other than CircuitPython.
+
+        return self._mem_before, self._mem_after
+
+    @property
+    def brightness(self):
+        # Brightness of all of the LEDs, from 0.0 to 1.0. It is applied as
+        # the LEDs are updated, so keys keep their colours and changing it
+        # doesn't mean setting them again.
+
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, brightness):
+        self._brightness = min(max(brightness, 0.0), 1.0)
+        self.hardware.set_brightness(self._brightness)
+        self._reload_scenes()
+
+    @property
+    def gamma(self):
+        # Gamma curve applied to all of the LEDs' colours, 1.0 for none.
+        # Around 2.2 makes steps in colour look more even.
+
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, gamma):
+        self._gamma = gamma
+        self.hardware.set_gamma(gamma)
+        self._reload_scenes()
+
+    def _schedule_hold(self, number, deadline):
+        # Schedule a key to count as held at the `deadline` tick.
+
+        self._hold_deadlines[number] = deadline
+        if not self._holding or ticks_diff(deadline, self._next_hold) < 0:
+            self._next_hold = deadline
+        self._holding |= 1 << number
+
+    def _fire_holds(self, now):
+        # Mark every key whose hold deadline has passed as held, calling
+        # its `hold_function`, then find the next deadline. Deadlines of
+        # keys released in the meantime were cancelled on release.
+
+        holding = self._holding
+        number = 0
+        next_hold = None
+        while holding:
+            if holding & 1:
+                deadline = self._hold_deadlines[number]
+                if ticks_diff(now, deadline) > 0:
+                    self._holding &= ~(1 << number)
+                    _key = self.keys[number]
+                    _key.held = True
+                    if _key.hold_function is not None and not _key.hold_func_fired:
+                        self._call(_key.hold_function, _key)
+                        _key.hold_func_fired = True
+                elif next_hold is None or ticks_diff(deadline, next_hold) < 0:
+                    next_hold = deadline
+            holding >>= 1
+            number += 1
+
+        if next_hold is not None:
+            self._next_hold = next_hold
+
+    def _push_event(self, number, pressed, timestamp):
+        # Add an event to the queue, overwriting the oldest one if full.
+
+        i = self._event_head
+        self._event_keys[i] = number | 0x80 if pressed else number
+        self._event_times[i] = timestamp
+        self._event_head = (i + 1) % len(self._event_keys)
+        if self._event_count < len(self._event_keys):
+            self._event_count += 1
+
+    def _dispatch(self, event):
+        # Call the press or release function for a queued event.
+
+        _key = self.keys[event & 0x7F]
+        if event & 0x80:
+            if self.animation is not None:
+                self.animation.press(_key.number)
+            if _key.press_function is not None:
+                self._call(_key.press_function, _key)
+        else:
+            if _key.release_function is not None:
+                self._call(_key.release_function, _key)
+            _key.held = False
+            _key.hold_func_fired = False
+
+    def _call(self, handler, _key):
+        # Call a press, release or hold function. If it is an `async`
+        # function, what it returns is a coroutine, which is run as a task
+        # alongside the others started by `run_async()`. Anything else a
+        # function returns is ignored.
+
+        result = handler(_key)
+        if hasattr(result, "send"):
+            if self._asyncio is None:
+                # There's nothing to run it, so don't let it go missing.
+                result.close()
+                raise RuntimeError("async key functions need keybow.run()")
+            self._asyncio.create_task(result)
+
+    async def run_async(self, *coroutines, scan_interval=None, led_interval=None):
+        # Runs Keybow with CircuitPython's `asyncio`, instead of calling
+        # `update()` in a `while True` loop. The keys are scanned every
+        # `scan_interval` seconds and the LEDs updated every `led_interval`
+        # seconds, going by `scan_rate` and `led_rate` unless given, each
+        # in its own task, and any coroutines passed in are run as tasks
+        # alongside them. Press, release and hold functions attached with
+        # the decorators can be `async` functions.
+
+        # async def blink():
+        #     while True:
+        #         keybow.keys[0].toggle_led()
+        #         await asyncio.sleep(0.5)
+        #
+        # asyncio.run(keybow.run_async(blink()))
+
+        import asyncio
+        self._asyncio = asyncio
+
+        if scan_interval is None:
+            scan_interval = 1 / self._scan_rate if self._scan_rate else 0
+        if led_interval is None:
+            led_interval = 1 / self._led_rate if self._led_rate else 0
+
+        tasks = [
+            asyncio.create_task(self._every(self.update_keys, scan_interval)),
+            asyncio.create_task(self._every(self.update_leds, led_interval)),
+        ]
+        for coroutine in coroutines:
+            tasks.append(asyncio.create_task(coroutine))
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self._asyncio = None
+
+    def run(self, *coroutines, scan_interval=None, led_interval=None):
+        # Runs `run_async()` until the program is stopped.
+
+        import asyncio
+        asyncio.run(self.run_async(*coroutines, scan_interval=scan_interval, led_interval=led_interval))
+
+    async def _every(self, function, interval):
+        # Call a function every `interval` seconds, forever.
+
+        while True:
+            function()
+            await self._asyncio.sleep(interval)
+
+    def events(self):
+        # Drains the event queue, yielding a `(number, pressed, timestamp)`
+        # tuple for each key press or release since the last call, oldest
+        # first. The timestamp is the `ticks_ms()` of the scan that saw the
+        # event; compare timestamps with `ticks_diff()`. Handlers attached
+        # with the decorators still run as part of `update()`, whether or
+        # not the queue is drained.
+
+        # for number, pressed, timestamp in keybow.events():
+        #     do something
+
+        size = len(self._event_keys)
+        while self._event_count:
+            i = (self._event_head - self._event_count) % size
+            self._event_count -= 1
+            event = self._event_keys[i]
+            yield event & 0x7F, bool(event & 0x80), self._event_times[i]
+
+    def clear_events(self):
+        # Discards any events waiting in the queue.
+
+        self._event_count = 0
+
     def set_led(self, number, r, g, b):
         # Set an individual key's LED to an RGB value by its number.
 
         self.keys[number].set_led(r, g, b)
 
     def set_all(self, r, g, b):
-        # Set all of Keybow's LEDs to an RGB value.
+        # Set all of Keybow's LEDs to an RGB value. If the LEDs are asleep,
+        # it shows when they wake up.
 
-        if not self.sleeping:
-            for _key in self.keys:
-                _key.set_led(r, g, b)
+        for _key in self.keys:
+            _key.set_led(r, g, b)
+
+    def animate(self, animation):
+        # Runs an animation on the LEDs, such as `Rainbow()`, `Ripple()`,
+        # `Breathe()` or `Fade()`, replacing any that's already running.
+        # Its frames are drawn as part of `update()`. Pass None to stop it,
+        # and show the keys' own colours again.
+
+        # keybow.animate(Ripple((0, 255, 255)))
+
+        self.animation = animation
+        if animation is not None:
+            animation.start(self)
         else:
             for _key in self.keys:
-                _key.led_off()
+                _key.led_state(_key.lit)
+
+    def add_layer(self):
+        # Adds a `Layer` on top of the keys' colours, and any other layers,
+        # and returns it. Keys that the layer has colours for show those
+        # instead, or mixed with what's beneath if not fully opaque, until
+        # the layer is hidden or removed, while keeping their own colours.
+
+        # hints = keybow.add_layer()
+        # hints.set_led(1, 255, 0, 255)
+        # hints.visible = False
+
+        layer = Layer(self)
+        self.layers.append(layer)
+        return layer
+
+    def remove_layer(self, layer):
+        # Removes a layer, showing whatever was beneath it again.
+
+        self.layers.remove(layer)
+        self._layers_changed(layer.mask)
+
+    def _layers_changed(self, mask):
+        # Work out which keys the visible layers cover, and mark the keys
+        # in `mask` to be drawn again.
+
+        covered = 0
+        for layer in self.layers:
+            if layer._visible:
+                covered |= layer.mask
+        self._covered = covered
+        self._recompose |= mask
+
+    def _composite(self):
+        # Draw each key marked in `_recompose`: its own colour, with the
+        # visible layers that cover it mixed over it from the bottom up.
+        # The frame buffer ignores keys that come out the same.
+
+        recompose = self._recompose
+        self._recompose = 0
+        set_pixel = self.hardware.set_pixel
+        rgb = self._rgb
+        lit = self._lit
+        number = 0
+        while recompose:
+            if recompose & 1:
+                i = number * 3
+                if lit[number]:
+                    r, g, b = rgb[i], rgb[i + 1], rgb[i + 2]
+                else:
+                    r = g = b = 0
+                bit = 1 << number
+                for layer in self.layers:
+                    if layer._visible and layer.mask & bit:
+                        a = layer._alpha[number]
+                        lr, lg, lb = layer._rgb[i], layer._rgb[i + 1], layer._rgb[i + 2]
+                        if a == 255:
+                            r, g, b = lr, lg, lb
+                        else:
+                            r += ((lr - r) * a) >> 8
+                            g += ((lg - g) * a) >> 8
+                            b += ((lb - b) * a) >> 8
+                set_pixel(number, r, g, b)
+            recompose >>= 1
+            number += 1
+
+    def add_scene(self, name, colours):
+        # Works out a set of colours for the keys once, so that they can
+        # all be shown at once later with `show_scene()`. The colours are
+        # a list of (r, g, b) tuples, one per key, or a dict of them by
+        # key number, in which case keys that aren't in it are off. Adding
+        # a scene with the same name replaces it.
+
+        # keybow.add_scene("numpad", {1: (255, 0, 255), 2: (255, 0, 255)})
+        # keybow.show_scene("numpad")
+
+        if name in self._scenes:
+            self.remove_scene(name)
+
+        rgb, lit = self._render(colours)
+        pixels = self.hardware.pixel_buffer(rgb)
+
+        # Keep it in a spare hardware frame too, if there's one free, so
+        # that showing it is a matter of switching frames.
+        frame = None
+        free = self._free_frames()
+        if free:
+            frame = free[0]
+            self.hardware.write_frame(frame, pixels)
+
+        self._scenes[name] = (rgb, lit, pixels, frame)
+
+    def remove_scene(self, name):
+        # Forgets a scene, freeing its hardware frame if it had one. If the
+        # frame is showing, the LEDs go back to the frame buffer first, so
+        # that it can be written again without the change showing.
+
+        frame = self._scenes.pop(name)[3]
+        if frame is not None:
+            self.hardware.release_frame(frame)
+
+    def show_scene(self, name):
+        # Sets all of the keys to a scene's colours, in one go. Any layers
+        # are drawn over it as usual.
+
+        rgb, lit, pixels, frame = self._scenes[name]
+        self._rgb[:] = rgb
+        self._lit[:] = lit
+
+        # The keys' colours are all that's needed while an animation is
+        # running; it shows them when it stops.
+        if self.animation is not None:
+            return
+        if self._covered:
+            self.hardware.set_pixels(pixels)
+            self._recompose |= self._covered
+        else:
+            self.hardware.set_pixels(pixels, frame)
+
+    def _render(self, colours):
+        # Lay out a list of (r, g, b) tuples, one per key, or a dict of
+        # them by key number, like `_rgb` and `_lit`.
+
+        num_keys = len(self.keys)
+        rgb = bytearray(num_keys * 3)
+        lit = bytearray(num_keys)
+        if isinstance(colours, dict):
+            colours = [colours.get(i, (0, 0, 0)) for i in range(num_keys)]
+        for i in range(num_keys):
+            r, g, b = colours[i]
+            rgb[i * 3:i * 3 + 3] = bytes((r, g, b))
+            lit[i] = 1 if r or g or b else 0
+        return rgb, lit
+
+    def _free_frames(self):
+        # Spare hardware frames not in use by a scene or by `play()`.
+
+        used = [scene[3] for scene in self._scenes.values()]
+        return [frame for frame in self.hardware.spare_frames()
+                if frame not in used and frame not in self._playing]
+
+    def play(self, frames, delay=0.1, loops=0, fade_in=None, fade_out=None, off_time=0.0):
+        # Loads a list of frames, each a set of colours like a scene's, into
+        # the LED driver chip and has it play them in turn, each for `delay`
+        # seconds, `loops` times (up to 7), or forever if 0. With `fade_in`
+        # (and `fade_out`) in seconds, the chip also fades each frame in and
+        # out, staying off for `off_time` in between, so one frame makes a
+        # breathing glow. It all runs in hardware, costing nothing in your
+        # loop, until `stop_playing()`, and other LED changes don't show
+        # until then. Only Keybow 2040 can do this, with up to as many
+        # frames as are left over by scenes, one after another.
+
+        # keybow.play([{0: (0, 0, 64)}], fade_in=1.6, fade_out=1.6)
+
+        self.stop_playing()
+
+        # The chip plays frames that are next to each other, so find a run
+        # of free ones long enough.
+        count = len(frames)
+        free = self._free_frames()
+        first = None
+        for i in range(len(free) - count + 1 if count else 0):
+            if free[i + count - 1] - free[i] == count - 1:
+                first = free[i]
+                break
+        if first is None:
+            raise ValueError("Not enough spare frames")
+
+        for i, colours in enumerate(frames):
+            rgb, lit = self._render(colours)
+            self.hardware.write_frame(first + i, self.hardware.pixel_buffer(rgb))
+        self._playing = range(first, first + count)
+
+        self.hardware.set_breath(fade_in, fade_out, off_time)
+        self.hardware.play_frames(first, count, delay, loops)
+
+    def stop_playing(self):
+        # Stops the frames started by `play()`, and shows the keys' own
+        # colours again.
+
+        if self._playing:
+            self.hardware.stop_frames()
+            self._playing = ()
+
+    @property
+    def playing(self):
+        # Whether the LED driver chip is playing frames from `play()`.
+
+        return bool(self._playing)
+
+    def _reload_scenes(self):
+        # Rewrite the scenes' hardware frames, which are written with the
+        # brightness and gamma at the time.
+
+        for rgb, lit, pixels, frame in self._scenes.values():
+            if frame is not None:
+                self.hardware.write_frame(frame, pixels)
 
     def get_states(self):
         # Returns a Boolean list of Keybow's key states
         # (0=not pressed, 1=pressed).
 
-        _states = [_key.state for _key in self.keys]
-        return _states
+        _states = self._states
+        return [(_states >> i) & 1 for i in range(len(self.keys))]
 
     def get_pressed(self):
         # Returns a list of key numbers currently pressed.
 
-        _pressed = [_key.number for _key in self.keys if _key.state == True]
-        return _pressed
+        _states = self._states
+        return [i for i in range(len(self.keys)) if (_states >> i) & 1]
+
+    def get_mask(self):
+        # Returns the key states as one integer, with bit n set if key n
+        # is pressed.
+
+        return self._states
 
     def any_pressed(self):
         # Returns True if any key is pressed, False if none are pressed.
 
-        if any(self.get_states()):
-            return True
-        else:
-            return False
+        return self._states != 0
 
     def none_pressed(self):
         # Returns True if none of the keys are pressed, False is any key
         # is pressed.
 
-        if not any(self.get_states()):
-            return True
-        else:
-            return False
+        return self._states == 0
 
     def on_press(self, _key, handler=None):
         # Attaches a press function to a key, via a decorator. This is stored as
@@ -253,21 +873,36 @@ class Key:
 
     :param number: the key number (0-15) to associate with the key
     :param hardware:  object representing a board hardware
+    :param keybow: the Keybow2040 the key belongs to, which stores its
+        colour; if not given the key stores its own
     """
-    def __init__(self, number, hardware):
+    # Keys have a fixed set of attributes, so there's no need for a dict
+    # per key.
+    __slots__ = (
+        "hardware", "number", "_rgb", "_lit", "state", "pressed",
+        "last_state", "_press_ticks", "held", "_hold_ms", "modifier", "xy",
+        "x", "y", "press_function", "release_function", "hold_function",
+        "press_func_fired", "hold_func_fired", "_debounce_ms",
+        "key_locked", "_integrator", "_last_update", "_keybow",
+    )
+
+    def __init__(self, number, hardware, keybow=None):
         self.hardware = hardware
         self.number = number
+        self._keybow = keybow
+        if keybow is None:
+            self._rgb = bytearray(3)
+            self._lit = bytearray(1)
+        else:
+            self._rgb = memoryview(keybow._rgb)[number * 3:number * 3 + 3]
+            self._lit = memoryview(keybow._lit)[number:number + 1]
         self.state = 0
         self.pressed = 0
         self.last_state = None
-        self.time_of_last_press = time.monotonic()
-        self.time_since_last_press = None
-        self.time_held_for = 0
+        self._press_ticks = ticks_ms()
         self.held = False
-        self.hold_time = 0.75
+        self._hold_ms = 750
         self.modifier = False
-        self.rgb = [0, 0, 0]
-        self.lit = False
         self.xy = self.get_xy()
         self.x, self.y = self.xy
         self.led_off()
@@ -276,72 +911,148 @@ class Key:
         self.hold_function = None
         self.press_func_fired = False
         self.hold_func_fired = False
-        self.debounce = 0.125
+        self._debounce_ms = 5
         self.key_locked = False
+        self._integrator = 0
+        self._last_update = self._press_ticks
+
+    @property
+    def rgb(self):
+        # The key's colour, kept even while its LED is off.
+
+        return self._rgb[0], self._rgb[1], self._rgb[2]
+
+    @rgb.setter
+    def rgb(self, rgb):
+        self._rgb[0], self._rgb[1], self._rgb[2] = rgb
+
+    @property
+    def lit(self):
+        # Whether the key's LED is on.
+
+        return self._lit[0] != 0
+
+    @lit.setter
+    def lit(self, lit):
+        self._lit[0] = 1 if lit else 0
+
+    @property
+    def hold_time(self):
+        # Seconds a key must be held down for to count as held.
+
+        return self._hold_ms / 1000
+
+    @hold_time.setter
+    def hold_time(self, seconds):
+        self._hold_ms = int(seconds * 1000)
+
+    @property
+    def debounce(self):
+        # Seconds a switch must read steadily pressed or released for the
+        # key to change state.
+
+        return self._debounce_ms / 1000
+
+    @debounce.setter
+    def debounce(self, seconds):
+        self._debounce_ms = int(seconds * 1000)
+        self._integrator = self._debounce_ms * 2 if self.pressed else 0
+
+    @property
+    def time_of_last_press(self):
+        # The `time.monotonic()` at which the key was last pressed.
+
+        return time.monotonic() - ticks_diff(ticks_ms(), self._press_ticks) / 1000
+
+    @property
+    def time_since_last_press(self):
+        # Seconds since the key was last pressed.
+
+        return ticks_diff(ticks_ms(), self._press_ticks) / 1000
+
+    @property
+    def time_held_for(self):
+        # Seconds the key has been held for, or 0 if it isn't pressed.
+
+        if not self.pressed:
+            return 0
+        return ticks_diff(ticks_ms(), self._press_ticks) / 1000
 
     def get_state(self):
         # Returns the state of the key (0=not pressed, 1=pressed).
 
         return int(self.hardware.switch_state(self.number))
 
-    def update(self):
+    def update(self, state=None, update_time=None):
         # Updates the state of the key and updates all of its
-        # attributes.
-
-        self.time_since_last_press = time.monotonic() - self.time_of_last_press
-
-        # Keys get locked during the debounce time.
-        if self.time_since_last_press < self.debounce:
-            self.key_locked = True
+        # attributes. The switch state and time can be passed in by
+        # Keybow, which reads all of the switches once per scan, as a
+        # `ticks_ms()` value, otherwise they are read here. Returns 1 if
+        # the key has just been pressed, -1 if it has just been released,
+        # and 0 otherwise; Keybow queues these as events and calls the
+        # press and release functions. Keybow only updates keys that have
+        # changed or are still active, so the key's attributes only move
+        # on when it is updated.
+
+        if update_time is None:
+            update_time = ticks_ms()
+
+        if state is None:
+            state = self.get_state()
+
+        # Debounce by integrating the raw switch state over time: the
+        # integrator counts up while the switch reads pressed and down
+        # while it reads released, and the key only changes state when
+        # it reaches either end of the `debounce` window. Contact bounce
+        # on press or release moves it back and forth in between without
+        # triggering anything. It counts in half milliseconds, by the
+        # time since the last update, but by no more than half the window,
+        # so however slow the loop, a single stray reading can't change
+        # the key's state.
+        window = self._debounce_ms * 2
+        step = min(ticks_diff(update_time, self._last_update) * 2, self._debounce_ms)
+        self._last_update = update_time
+
+        was_pressed = self.pressed
+        if state:
+            self._integrator += step
+            if self._integrator >= window:
+                self._integrator = window
+                self.pressed = 1
         else:
-            self.key_locked = False
-
-        self.state = self.get_state()
-        self.pressed = self.state
-        update_time = time.monotonic()
-
-        # If there's a `press_function` attached, then call it,
-        # returning the key object and the pressed state.
-        if self.press_function is not None and self.pressed and not self.press_func_fired and not self.key_locked:
-            self.press_function(self)
+            self._integrator -= step
+            if self._integrator <= 0:
+                self._integrator = 0
+                self.pressed = 0
+
+        # Keys are locked while the integrator is part way through the
+        # debounce window.
+        self.key_locked = 0 < self._integrator < window
+
+        self.state = self.pressed
+        edge = 0
+
+        # If the key has just been pressed, count a press and record the
+        # `time_of_last_press`. The `press_func_fired` ensures that it is
+        # only counted once.
+        if self.pressed and not was_pressed:
+            self._press_ticks = update_time
             self.press_func_fired = True
-            # time.sleep(0.05)  # A little debounce
-
-        # If the key has been pressed and releases, then call
-        # the `release_function`, if one is attached.
-        if not self.pressed and self.last_state == True:
-            if self.release_function is not None:
-                self.release_function(self)
-            self.last_state = False
+            edge = 1
+
+        # If the key has been pressed and released, then count a release.
+        elif was_pressed and not self.pressed:
             self.press_func_fired = False
+            edge = -1
 
-        if not self.pressed:
-            self.time_held_for = 0
-            self.last_state = False
-
-        # If the key has just been pressed, then record the
-        # `time_of_last_press`, and update last_state.
-        elif self.pressed and self.last_state == False:
-            self.time_of_last_press = update_time
-            self.last_state = True
-
-        # If the key is pressed and held, then update the
-        # `time_held_for` variable.
-        elif self.pressed and self.last_state == True:
-            self.time_held_for = update_time - self.time_of_last_press
-            self.last_state = True
-
-        # If the `hold_time` theshold is crossed, then call the
-        # `hold_function` if one is attached. The `hold_func_fired`
-        # ensures that the function is only called once.
-        if self.time_held_for > self.hold_time:
-            self.held = True
-            if self.hold_function is not None and not self.hold_func_fired:
-                self.hold_function(self)
-                self.hold_func_fired = True
-        else:
-            self.held = False
-            self.hold_func_fired = False
+        self.last_state = bool(self.pressed)
+
+        # Keybow schedules the hold itself when the key is pressed, and
+        # marks it as held and calls the `hold_function` once `hold_time`
+        # has passed. It stops being held once its release function has
+        # run, so that can tell a tap from the end of a hold.
+
+        return edge
 
     def get_xy(self):
         # Returns the x/y coordinate of a key from 0,0 to 3,3.
@@ -365,19 +1076,29 @@ class Key:
     def set_led(self, r, g, b):
         # Set this key's LED to an RGB value.
 
-        if [r, g, b] == [0, 0, 0]:
-            self.lit = False
+        if r or g or b:
+            self._lit[0] = 1
+            self._rgb[0] = r
+            self._rgb[1] = g
+            self._rgb[2] = b
         else:
-            self.lit = True
-            self.rgb = [r, g, b]
-
+            self._lit[0] = 0
+
+        # While an animation is running, the colour shows when it stops.
+        # If a layer covers the key, Keybow works out what to show.
+        keybow = self._keybow
+        if keybow is not None:
+            if keybow.animation is not None:
+                return
+            if keybow._covered & (1 << self.number):
+                keybow._recompose |= 1 << self.number
+                return
         self.hardware.set_pixel(self.number, r, g, b)
 
     def led_on(self):
         # Turn the LED on, using its current RGB value.
 
-        r, g, b = self.rgb
-        self.set_led(r, g, b)
+        self.set_led(self._rgb[0], self._rgb[1], self._rgb[2])
 
     def led_off(self):
         # Turn the LED off.
@@ -412,6 +1133,44 @@ class Key:
         # When printed, show the key's state (0 or 1).
         return self.state
 
+def _mem_free():
+    # Collect garbage and return the free heap in bytes, or None if the
+    # `gc` module can't report it.
+    gc.collect()
+    if hasattr(gc, "mem_free"):
+        return gc.mem_free()
+    return None
+
+def ticks_add(ticks, delta):
+    # Add a delta in milliseconds to a `ticks_ms()` value.
+    return (ticks + delta) & _TICKS_MAX
+
+def ticks_diff(ticks1, ticks2):
+    # Milliseconds from `ticks2` to `ticks1`, allowing for wrap-around.
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+def _timer(rate):
+    # A timer for `rate` times per second, due now: its deadline in ms, the
+    # microseconds carried over past it, and its interval in microseconds,
+    # 0 for every call. A list so that `_advance()` can move it on in place.
+    return [ticks_ms(), 0, round(1000000 / rate) if rate else 0]
+
+
+def _advance(timer, now):
+    # Moves a timer's deadline on by its interval, carrying the part of a
+    # millisecond left over, so that it keeps to its rate on average, or on
+    # from `now` if it's a whole interval behind, so that a late update
+    # doesn't lead to a burst of them to catch up.
+    deadline = timer[0]
+    interval = timer[2]
+    carry = timer[1] + interval
+    if ticks_diff(now, deadline) * 1000 >= interval:
+        deadline = now
+        carry = interval
+    timer[0] = ticks_add(deadline, carry // 1000)
+    timer[1] = carry % 1000
+
 def xy_to_number(x, y):
     # Convert an x/y coordinate to key number.
     return x + (y * 4)
@@ -423,28 +1182,349 @@ def number_to_xy(number):
 
     return (x, y)
 
+def _hue_table():
+    # Fully saturated, full value RGB colour for each of 256 hues, three
+    # bytes per hue, worked out with integer maths once at import.
+    table = bytearray(256 * 3)
+    for h in range(256):
+        sector = (h * 6) >> 8
+        f = (h * 6) & 0xFF
+        if sector == 0:
+            rgb = (255, f, 0)
+        elif sector == 1:
+            rgb = (255 - f, 255, 0)
+        elif sector == 2:
+            rgb = (0, 255, f)
+        elif sector == 3:
+            rgb = (0, 255 - f, 255)
+        elif sector == 4:
+            rgb = (f, 0, 255)
+        else:
+            rgb = (255, 0, 255 - f)
+        table[h * 3:h * 3 + 3] = bytes(rgb)
+    return table
+
+_HUE_TABLE = _hue_table()
+
+def hsv8_into(buffer, offset, h, s, v):
+    # Convert an integer HSV (0-255) colour to RGB (0-255), writing it into
+    # `buffer[offset:offset + 3]` without allocating. The hue wraps around,
+    # so it can be incremented freely for animations.
+    i = (h & 0xFF) * 3
+    s += 1
+    v += 1
+    buffer[offset] = ((255 - (((255 - _HUE_TABLE[i]) * s) >> 8)) * v) >> 8
+    buffer[offset + 1] = ((255 - (((255 - _HUE_TABLE[i + 1]) * s) >> 8)) * v) >> 8
+    buffer[offset + 2] = ((255 - (((255 - _HUE_TABLE[i + 2]) * s) >> 8)) * v) >> 8
+    return buffer
+
+_RGB = bytearray(3)
+
+def hsv8_to_rgb(h, s, v):
+    # Convert an integer HSV (0-255) colour to an RGB (0-255) tuple.
+    hsv8_into(_RGB, 0, h, s, v)
+    return _RGB[0], _RGB[1], _RGB[2]
+
 def hsv_to_rgb(h, s, v):
-    # Convert an HSV (0.0-1.0) colour to RGB (0-255)
-    if s == 0.0:
-        rgb = [v, v, v]
-    
-    i = int(h * 6.0)
-
-    f = (h*6.)-i; p,q,t = v*(1.-s), v*(1.-s*f), v*(1.-s*(1.-f)); i%=6
-    
-    if i == 0:
-        rgb = [v, t, p]
-    if i == 1:
-        rgb = [q, v, p]
-    if i == 2:
-        rgb = [p, v, t]
-    if i == 3:
-        rgb = [p, q, v]
-    if i == 4:
-        rgb = [t, p, v]
-    if i == 5:
-        rgb = [v, p, q]
-
-    rgb = tuple(int(c * 255) for c in rgb)
-
-    return rgb
\ No newline at end of file
+    # Convert an HSV (0.0-1.0) colour to RGB (0-255). Kept for
+    # compatibility; `hsv8_to_rgb()` and `hsv8_into()` avoid the floats.
+    return hsv8_to_rgb(int(h * 256), int(s * 255), int(v * 255))
+
+class Layer:
+    """
+    A layer of LED colours over the keys' own colours, made with
+    `Keybow2040.add_layer()`.
+
+    Only keys the layer has been given a colour for are covered, with a
+    bit set in `mask` for each. Each has an alpha, from 0 (see-through)
+    to 255 (opaque), to mix it with what's beneath. Hiding the layer
+    uncovers its keys without forgetting its colours.
+
+    :param keybow: the Keybow2040 the layer belongs to
+    """
+    __slots__ = ("_keybow", "_rgb", "_alpha", "mask", "_visible")
+
+    def __init__(self, keybow):
+        num_keys = len(keybow.keys)
+        self._keybow = keybow
+        self._rgb = bytearray(num_keys * 3)
+        self._alpha = bytearray(num_keys)
+        self.mask = 0
+        self._visible = True
+
+    @property
+    def visible(self):
+        # Whether the layer is shown.
+
+        return self._visible
+
+    @visible.setter
+    def visible(self, visible):
+        visible = bool(visible)
+        if visible != self._visible:
+            self._visible = visible
+            self._keybow._layers_changed(self.mask)
+
+    def set_led(self, number, r, g, b, alpha=255):
+        # Cover a key with an RGB value, mixed with what's beneath by
+        # `alpha`.
+
+        i = number * 3
+        self._rgb[i] = r
+        self._rgb[i + 1] = g
+        self._rgb[i + 2] = b
+        self._alpha[number] = alpha
+        bit = 1 << number
+        if self.mask & bit:
+            if self._visible:
+                self._keybow._recompose |= bit
+        else:
+            self.mask |= bit
+            if self._visible:
+                self._keybow._layers_changed(bit)
+
+    def set_all(self, r, g, b, alpha=255):
+        # Cover all of the keys with an RGB value.
+
+        for number in range(len(self._alpha)):
+            self.set_led(number, r, g, b, alpha)
+
+    def clear(self, number=None):
+        # Uncover a key, or all of them if no key number is given.
+
+        mask = self.mask if number is None else self.mask & (1 << number)
+        if mask:
+            self.mask &= ~mask
+            if self._visible:
+                self._keybow._layers_changed(mask)
+
+# Each key's x/y coordinate, and the distance between every pair of keys,
+# in 32nds of the spacing between neighbouring keys, so that animations
+# can look them up rather than work them out on every frame. The distance
+# from key a to key b is `_KEY_DISTANCE[a * 16 + b]`.
+_KEY_X = bytes(number_to_xy(i)[0] for i in range(16))
+_KEY_Y = bytes(number_to_xy(i)[1] for i in range(16))
+_KEY_DISTANCE = bytes(
+    int((((_KEY_X[a] - _KEY_X[b]) ** 2 + (_KEY_Y[a] - _KEY_Y[b]) ** 2) ** 0.5) * 32 + 0.5)
+    for a in range(16) for b in range(16)
+)
+_MAX_DISTANCE = max(_KEY_DISTANCE)
+
+class Animation:
+    """
+    Base class for LED animations, run with `Keybow2040.animate()`.
+
+    Subclasses implement draw(), which is called with the milliseconds
+    since the last frame, no more than `fps` times a second, and draws a
+    frame with `keybow.hardware.set_pixel()`. Timing is kept in integer
+    phase accumulators, so animations don't drift or allocate.
+
+    :param fps: the most frames per second to draw
+    """
+    def __init__(self, fps=60):
+        self._frame_ms = 1000 // fps
+        self._last_frame = None
+
+    def start(self, keybow):
+        # Called when the animation is started with `animate()`.
+        self._last_frame = None
+
+    def press(self, number):
+        # Called when a key is pressed while the animation is running.
+        pass
+
+    def draw(self, keybow, elapsed):
+        # Draw a frame, `elapsed` milliseconds after the last one. Return
+        # False once the animation has finished.
+        raise NotImplementedError
+
+    def _tick(self, keybow, now):
+        # Draw a frame if one is due. Returns False once finished.
+        if self._last_frame is None:
+            elapsed = 0
+        else:
+            elapsed = ticks_diff(now, self._last_frame)
+            if elapsed < self._frame_ms:
+                return True
+        self._last_frame = now
+        return self.draw(keybow, elapsed)
+
+class Rainbow(Animation):
+    """
+    A rainbow moving diagonally across the keys.
+
+    :param speed: hue steps (of 256) per second the rainbow moves by
+    :param spread: hue steps between neighbouring diagonals of keys
+    :param saturation: saturation of the colours, from 0 to 255
+    :param value: brightness of the colours, from 0 to 255
+    :param fps: the most frames per second to draw
+    """
+    def __init__(self, speed=64, spread=32, saturation=255, value=255, fps=60):
+        super().__init__(fps)
+        self.speed = speed
+        self.saturation = saturation
+        self.value = value
+        self._offsets = bytes(((_KEY_X[i] + _KEY_Y[i]) * spread) & 0xFF for i in range(16))
+        self._phase = 0
+        self._rgb = bytearray(3)
+
+    def draw(self, keybow, elapsed):
+        # The phase counts in thousandths of a hue step.
+        self._phase = (self._phase + self.speed * elapsed) % 256000
+        hue = self._phase // 1000
+        rgb = self._rgb
+        set_pixel = keybow.hardware.set_pixel
+        for i in range(len(keybow.keys)):
+            hsv8_into(rgb, 0, hue + self._offsets[i], self.saturation, self.value)
+            set_pixel(i, rgb[0], rgb[1], rgb[2])
+        return True
+
+class Breathe(Animation):
+    """
+    All of the keys fading up and down in one colour.
+
+    :param rgb: the colour, as an (r, g, b) tuple
+    :param period: seconds for each breath in and out
+    :param fps: the most frames per second to draw
+    """
+    def __init__(self, rgb, period=2.0, fps=60):
+        super().__init__(fps)
+        self.rgb = rgb
+        self._period_ms = max(int(period * 1000), 1)
+        self._phase = 0
+
+    def draw(self, keybow, elapsed):
+        self._phase = (self._phase + elapsed) % self._period_ms
+        level = self._phase * 510 // self._period_ms
+        if level > 255:
+            level = 510 - level
+        # Square the level so the fade looks even to the eye.
+        level = (level * level) >> 8
+        r, g, b = self.rgb
+        r = (r * level) >> 8
+        g = (g * level) >> 8
+        b = (b * level) >> 8
+        set_pixel = keybow.hardware.set_pixel
+        for i in range(len(keybow.keys)):
+            set_pixel(i, r, g, b)
+        return True
+
+class Ripple(Animation):
+    """
+    A ring of colour spreading out from each key pressed, over the keys'
+    own colours.
+
+    :param rgb: the colour of the ripples, as an (r, g, b) tuple
+    :param speed: keys per second the ripples spread by
+    :param width: width of the ripples, in keys
+    :param count: the most ripples shown at once
+    :param fps: the most frames per second to draw
+    """
+    def __init__(self, rgb, speed=6.0, width=1.0, count=4, fps=60):
+        super().__init__(fps)
+        self.rgb = rgb
+        self._speed = int(speed * 32)
+        self._width = max(int(width * 32), 1)
+        # Each ripple's key and radius, the radius in thousandths of a
+        # 32nd of a key, with a bit set in `_running` for each ripple
+        # that's spreading.
+        self._origins = bytearray(count)
+        self._radii = [0] * count
+        self._running = 0
+        self._next = 0
+        self._levels = bytearray(16)
+
+    def press(self, number):
+        # Start a ripple from the key, replacing the oldest if need be.
+        i = self._next
+        self._origins[i] = number
+        self._radii[i] = 0
+        self._running |= 1 << i
+        self._next = (i + 1) % len(self._origins)
+
+    def draw(self, keybow, elapsed):
+        levels = self._levels
+        num_keys = len(keybow.keys)
+        for k in range(num_keys):
+            levels[k] = 0
+
+        width = self._width
+        for i in range(len(self._origins)):
+            if not self._running & (1 << i):
+                continue
+            self._radii[i] += self._speed * elapsed
+            radius = self._radii[i] // 1000
+            if radius > _MAX_DISTANCE + width:
+                self._running &= ~(1 << i)
+                continue
+            row = self._origins[i] * 16
+            for k in range(num_keys):
+                d = _KEY_DISTANCE[row + k] - radius
+                if d < 0:
+                    d = -d
+                if d < width:
+                    level = 255 - d * 255 // width
+                    if level > levels[k]:
+                        levels[k] = level
+
+        # Blend the ripples over the keys' own colours.
+        r, g, b = self.rgb
+        base = keybow._rgb
+        lit = keybow._lit
+        set_pixel = keybow.hardware.set_pixel
+        for k in range(num_keys):
+            level = levels[k]
+            i = k * 3
+            if lit[k]:
+                br, bg, bb = base[i], base[i + 1], base[i + 2]
+            else:
+                br = bg = bb = 0
+            set_pixel(k,
+                      br + (((r - br) * level) >> 8),
+                      bg + (((g - bg) * level) >> 8),
+                      bb + (((b - bb) * level) >> 8))
+        return True
+
+class Fade(Animation):
+    """
+    All of the keys fading from their own colours to one colour, which
+    they are then set to, at which point the animation finishes.
+
+    :param rgb: the colour to fade to, as an (r, g, b) tuple
+    :param duration: seconds the fade takes
+    :param fps: the most frames per second to draw
+    """
+    def __init__(self, rgb, duration=1.0, fps=60):
+        super().__init__(fps)
+        self.rgb = rgb
+        self._duration_ms = max(int(duration * 1000), 1)
+        self._time = 0
+        self._from = None
+
+    def start(self, keybow):
+        # Take the colours the keys are showing to fade from.
+        super().start(keybow)
+        self._time = 0
+        self._from = bytearray(keybow._rgb)
+        for k in range(len(keybow.keys)):
+            if not keybow._lit[k]:
+                self._from[k * 3:k * 3 + 3] = b"\x00\x00\x00"
+
+    def draw(self, keybow, elapsed):
+        self._time += elapsed
+        if self._time >= self._duration_ms:
+            keybow.set_all(*self.rgb)
+            return False
+
+        t = self._time * 256 // self._duration_ms
+        r, g, b = self.rgb
+        start = self._from
+        set_pixel = keybow.hardware.set_pixel
+        for k in range(len(keybow.keys)):
+            i = k * 3
+            fr, fg, fb = start[i], start[i + 1], start[i + 2]
+            set_pixel(k,
+                      fr + (((r - fr) * t) >> 8),
+                      fg + (((g - fg) * t) >> 8),
+                      fb + (((b - fb) * t) >> 8))
+        return True
@@ -8,11 +8,62 @@ class Keybow:
     def set_pixel(self, idx, r, g, b):
         self._display.set_pixel(idx, r, g, b)
 
+    def set_pixels(self, buffer, frame=None):
+        self._display.set_pixels(buffer, frame)
+
+    def pixel_buffer(self, buffer):
+        # A colour buffer in key order, three bytes (r, g, b) per key,
+        # laid out in the display's pixel order, for set_pixels() and
+        # write_frame(). Subclasses that reorder pixels override this.
+        return buffer
+
+    def show(self):
+        self._display.show()
+
+    def set_brightness(self, brightness):
+        self._display.set_brightness(brightness)
+
+    def set_gamma(self, gamma):
+        self._display.set_gamma(gamma)
+
+    def sleep(self, asleep):
+        self._display.sleep(asleep)
+
+    def spare_frames(self):
+        return self._display.spare_frames()
+
+    def write_frame(self, frame, buffer):
+        self._display.write_frame(frame, buffer)
+
+    def show_frame(self, frame):
+        self._display.show_frame(frame)
+
+    def release_frame(self, frame):
+        self._display.release_frame(frame)
+
+    def play_frames(self, first, count, delay, loops=0):
+        self._display.play_frames(first, count, delay, loops)
+
+    def set_breath(self, fade_in=None, fade_out=None, off_time=0.0):
+        self._display.set_breath(fade_in, fade_out, off_time)
+
+    def stop_frames(self):
+        self._display.stop_frames()
+
     def num_keys(self):
         return self._switches.num_switches()
 
+    def update_switches(self):
+        self._switches.update()
+
     def switch_state(self, idx):
         return self._switches.switch_state(idx)
 
+    def read_mask(self):
+        return self._switches.read_mask()
+
+    def switches_debounced(self):
+        return self._switches.debounced
+
     def i2c(self):
         return self._i2c
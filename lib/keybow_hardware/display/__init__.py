@@ -1,6 +1,140 @@
+def _make_lut(brightness, gamma):
+    # Lookup table applying a brightness and gamma curve to each of the
+    # 256 levels of a colour channel, or None if it would change nothing.
+    if brightness == 1.0 and gamma == 1.0:
+        return None
+    return bytearray(int(((i / 255) ** gamma) * brightness * 255 + 0.5) for i in range(256))
+
 class Display:
     """
     Abstract class providing common interface to the set of pixels
+
+    Pixels are drawn into a frame buffer in RAM, three bytes (r, g, b) per
+    pixel, and nothing is sent to the hardware until show() is called.
+    Drawing a pixel in the colour it already has is ignored; otherwise the
+    pixel is marked dirty, with a bit per pixel in _dirty, and show() only
+    sends anything if a pixel is dirty. Subclasses should call __init__
+    with the number of pixels and implement _write_pixel(), or override
+    _write() to send the dirty pixels, or the whole frame, at once.
+
+    Global brightness and gamma are applied as the frame is sent, through
+    a 256 entry lookup table in _lut (None when they are both 1.0), so the
+    frame buffer always holds the colours as drawn.
     """
+    _dirty = 0
+    _asleep = False
+    _lut = None
+    _brightness = 1.0
+    _gamma = 1.0
+
+    def __init__(self, count):
+        self._count = count
+        self._buffer = bytearray(count * 3)
+        # The pixels may still be lit from before, so the first show()
+        # sends the whole (dark) frame.
+        self._dirty = (1 << count) - 1
+
     def set_pixel(self, idx, r, g, b):
+        buffer = self._buffer
+        i = idx * 3
+        if buffer[i] == r and buffer[i + 1] == g and buffer[i + 2] == b:
+            return
+        buffer[i] = r
+        buffer[i + 1] = g
+        buffer[i + 2] = b
+        self._dirty |= 1 << idx
+
+    def set_pixels(self, buffer, frame=None):
+        # Replace the whole frame buffer with a colour buffer laid out like
+        # it, in one copy. If `frame` is a spare frame already loaded with
+        # the same colours by write_frame(), backends that can show it do
+        # so at once, instead of sending the pixels.
+        if self._buffer != buffer:
+            self._buffer[:] = buffer
+            self._dirty = (1 << self._count) - 1
+
+    def show(self):
+        # Send the frame buffer to the hardware, if any pixels have
+        # changed since it was last shown.
+        if self._dirty:
+            dirty = self._dirty
+            self._dirty = 0
+            self._write(dirty)
+
+    def _write(self, dirty):
+        # Send the pixels with a bit set in the dirty mask.
+        buffer = self._buffer
+        lut = self._lut
+        idx = 0
+        while dirty:
+            if dirty & 1:
+                i = idx * 3
+                if self._asleep:
+                    self._write_pixel(idx, 0, 0, 0)
+                elif lut is None:
+                    self._write_pixel(idx, buffer[i], buffer[i + 1], buffer[i + 2])
+                else:
+                    self._write_pixel(idx, lut[buffer[i]], lut[buffer[i + 1]], lut[buffer[i + 2]])
+            dirty >>= 1
+            idx += 1
+
+    def _write_pixel(self, idx, r, g, b):
+        raise NotImplementedError
+
+    def set_brightness(self, brightness):
+        # Scale every pixel's brightness, from 0.0 to 1.0.
+        self._brightness = min(max(brightness, 0.0), 1.0)
+        self._levels_changed()
+
+    def set_gamma(self, gamma):
+        # Apply a gamma curve to every pixel, 1.0 for none.
+        self._gamma = gamma
+        self._levels_changed()
+
+    def _levels_changed(self):
+        # Rebuild the lookup table and redraw every pixel with it.
+        self._lut = _make_lut(self._brightness, self._gamma)
+        self._dirty = (1 << self._count) - 1
+
+    def sleep(self, asleep):
+        # Turn all of the pixels off, or back on, without changing the
+        # frame buffer. Pixels drawn while asleep show up on waking. This
+        # sends a dark frame; backends that can switch the pixels off in
+        # hardware should override it.
+        self._asleep = asleep
+        self._dirty = (1 << self._count) - 1
+
+    def spare_frames(self):
+        # Hardware frames, other than the one(s) showing the frame buffer,
+        # that can be loaded with write_frame() and shown with show_frame().
+        return ()
+
+    def write_frame(self, frame, buffer):
+        # Load a spare frame with a colour buffer laid out like the frame
+        # buffer, three bytes (r, g, b) per pixel.
+        raise NotImplementedError
+
+    def show_frame(self, frame):
+        # Show a spare frame, until the frame buffer next changes.
+        raise NotImplementedError
+
+    def release_frame(self, frame):
+        # If a spare frame is showing, go back to showing the frame buffer,
+        # so that the frame can be written again.
+        pass
+
+    def play_frames(self, first, count, delay, loops=0):
+        # Play `count` spare frames in turn, starting from `first`, in
+        # hardware, showing each for `delay` seconds and going through
+        # them `loops` times, or forever if 0, until stop_frames().
+        raise NotImplementedError
+
+    def set_breath(self, fade_in=None, fade_out=None, off_time=0.0):
+        # Fade frames played by play_frames() in and out over `fade_in`
+        # and `fade_out` seconds, staying off for `off_time` seconds in
+        # between, or stop fading them if `fade_in` is None.
+        raise NotImplementedError
+
+    def stop_frames(self):
+        # Stop playing frames, and show the frame buffer again.
         raise NotImplementedError
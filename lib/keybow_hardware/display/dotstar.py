@@ -1,13 +1,56 @@
 import adafruit_dotstar
+from digitalio import DigitalInOut, Direction
 
-from . import Display
+from . import Display, _make_lut
 
 class Dotstar(Display):
     """
     Display consisting of dotstars
+
+    Auto write is turned off, so each frame goes out as one SPI burst.
+    Brightness is set with each dotstar's own global brightness field,
+    rather than by scaling the colours, so only gamma goes through the
+    lookup table. Sleeping sets that field to zero.
+
+    :param clock: SPI clock pin
+    :param data: SPI data pin
+    :param count: number of dotstars
+    :param cs: optional chip select pin, held low for each frame
+    :param baudrate: SPI clock rate in Hz
     """
-    def __init__(self, clock, data, count):
-        self._pixels = adafruit_dotstar.DotStar(clock, data, count)
+    def __init__(self, clock, data, count, cs=None, baudrate=4000000):
+        super().__init__(count)
+        self._pixels = adafruit_dotstar.DotStar(clock, data, count, auto_write=False, baudrate=baudrate)
+        self._cs = None
+        if cs is not None:
+            self._cs = DigitalInOut(cs)
+            self._cs.direction = Direction.OUTPUT
+            self._cs.value = 1
+
+    def _write(self, dirty):
+        # Dotstars are daisy-chained, so the whole strip is always sent,
+        # but only the dirty pixels need copying into it first.
+        pixels = self._pixels
+        buffer = self._buffer
+        lut = self._lut
+        brightness = 0.0 if self._asleep else self._brightness
+        idx = 0
+        while dirty:
+            if dirty & 1:
+                i = idx * 3
+                if lut is None:
+                    pixels[idx] = (buffer[i], buffer[i + 1], buffer[i + 2], brightness)
+                else:
+                    pixels[idx] = (lut[buffer[i]], lut[buffer[i + 1]], lut[buffer[i + 2]], brightness)
+            dirty >>= 1
+            idx += 1
+
+        if self._cs is not None:
+            self._cs.value = 0
+        pixels.show()
+        if self._cs is not None:
+            self._cs.value = 1
 
-    def set_pixel(self, idx, r, g, b):
-        self._pixels[idx] = (r, g, b)
+    def _levels_changed(self):
+        self._lut = _make_lut(1.0, self._gamma)
+        self._dirty = (1 << self._count) - 1
@@ -2,12 +2,266 @@ from adafruit_is31fl3731.keybow2040 import Keybow2040 as Pixels
 
 from . import Display
 
+NUM_PIXELS = 16
+NUM_FRAMES = 8
+
+_BANK_ADDRESS = 0xFD
+_CONFIG_BANK = 0x0B
+_MODE_REGISTER = 0x00
+_FRAME_REGISTER = 0x01
+_AUTOPLAY1_REGISTER = 0x02
+_AUTOPLAY2_REGISTER = 0x03
+_BREATH1_REGISTER = 0x08
+_BREATH2_REGISTER = 0x09
+_SHUTDOWN_REGISTER = 0x0A
+_COLOR_OFFSET = 0x24
+_PWM_REGISTERS = 144
+
+_PICTURE_MODE = 0x00
+_AUTOPLAY_MODE = 0x08
+_BREATH_ENABLE = 0x10
+
+# Auto play frame delays are in steps of 11 ms, breathing fades in powers
+# of two of 26 ms and the time off between breaths in powers of two of
+# 3.5 ms (kept in tenths of a ms).
+_FRAME_DELAY_MS = 11
+_FADE_MS = 26
+_OFF_TENTHS_MS = 35
+
+_ALL_PIXELS = (1 << NUM_PIXELS) - 1
+
+def _power_of_two(time, unit):
+    # The power of two, from 0 to 7, of `unit` nearest to `time`.
+    n = 0
+    while n < 7 and time > (unit << n) * 3 // 2:
+        n += 1
+    return n
+
 class Keybow2040(Display):
     """
     Keybow 2040 4x4 display
+
+    Dirty pixels are sent to the IS31FL3731 as one auto-incrementing write
+    to the range of PWM registers that covers them, rather than a write
+    per LED.
+
+    The IS31FL3731 has eight frames, and shows whichever one its frame
+    register points at. Double buffered, frames 0 and 1 take turns: each
+    show() draws into the frame that isn't being shown, then flips to it
+    with one register write, so a frame is never seen half drawn. The
+    remaining frames are spare, and can be loaded with write_frame() and
+    shown straight away with show_frame(), or set_pixels() with the same
+    colours, which leaves the frame buffer showing them too.
+
+    Spare frames can also be played in turn by the IS31FL3731 itself,
+    with play_frames(), and faded in and out by its breathing engine,
+    with set_breath(), so they animate without any I2C traffic. The frame
+    buffer isn't shown again until stop_frames().
+
+    Sleeping uses the IS31FL3731's software shutdown, which turns the LEDs
+    off but keeps the frames, so waking up is a single register write.
+
+    :param i2c: i2c bus the IS31FL3731 is connected to
+    :param double_buffer: if True, draw into a back frame and flip
     """
-    def __init__(self, i2c):
+    def __init__(self, i2c, double_buffer=False):
+        super().__init__(NUM_PIXELS)
         self._pixels = Pixels(i2c)
+        self._device = self._pixels.i2c_device
+
+        # Offset into the PWM registers of the red, green and blue LED of
+        # each pixel, in frame buffer order, and the lowest and highest
+        # offset used by each pixel.
+        self._offsets = bytearray(NUM_PIXELS * 3)
+        self._first = bytearray(NUM_PIXELS)
+        self._last = bytearray(NUM_PIXELS)
+        for idx in range(NUM_PIXELS):
+            x = 4 * (3 - idx % 4) + idx // 4
+            for c in range(3):
+                self._offsets[idx * 3 + c] = Pixels.pixel_addr(x, c)
+            self._first[idx] = min(self._offsets[idx * 3:idx * 3 + 3])
+            self._last[idx] = max(self._offsets[idx * 3:idx * 3 + 3])
+
+        # Image of the PWM registers, with one spare byte in front. Before
+        # a write, the byte just ahead of the first register being sent is
+        # swapped for that register's address, so any range of registers
+        # can be written in a single transaction without copying.
+        self._pwm = bytearray(1 + _PWM_REGISTERS)
+        self._scratch = None
+        self._bank = bytearray((_BANK_ADDRESS, 0))
+        self._register = bytearray(2)
+
+        # The frames that take turns showing the frame buffer, a mask per
+        # frame of the pixels it is behind on, the frame to draw into next,
+        # the one last drawn into and the frame being shown.
+        self._live = 2 if double_buffer else 1
+        self._stale = [0] * self._live
+        self._back = 1 if double_buffer else 0
+        self._front = 0
+        self._shown = 0
+
+        # Pixels in the frame buffer that haven't been copied into the
+        # register image, because a spare frame is showing them.
+        self._deferred = 0
+
+    def _write(self, dirty):
+        pwm = self._pwm
+        offsets = self._offsets
+        buffer = self._buffer
+        lut = self._lut
+
+        # Catch up on any pixels set while a spare frame showed them.
+        dirty |= self._deferred
+        self._deferred = 0
+
+        # Copy the dirty pixels into the register image, through the
+        # brightness and gamma lookup table if there is one.
+        idx = 0
+        mask = dirty
+        while mask:
+            if mask & 1:
+                i = idx * 3
+                if lut is None:
+                    pwm[offsets[i] + 1] = buffer[i]
+                    pwm[offsets[i + 1] + 1] = buffer[i + 1]
+                    pwm[offsets[i + 2] + 1] = buffer[i + 2]
+                else:
+                    pwm[offsets[i] + 1] = lut[buffer[i]]
+                    pwm[offsets[i + 1] + 1] = lut[buffer[i + 1]]
+                    pwm[offsets[i + 2] + 1] = lut[buffer[i + 2]]
+            mask >>= 1
+            idx += 1
+
+        # Every live frame is now behind on the dirty pixels. Bring the
+        # back frame up to date and show it, then the other frame becomes
+        # the back frame.
+        for frame in range(self._live):
+            self._stale[frame] |= dirty
+
+        frame = self._back
+        self._upload(frame, pwm, self._stale[frame])
+        self._stale[frame] = 0
+        if self._shown != frame:
+            self._select(frame)
+        self._front = frame
+        self._back = (frame + 1) % self._live
+
+    def _upload(self, frame, pwm, pixels):
+        # Write the range of registers that covers the given pixels from
+        # a register image into a frame.
+        first = _PWM_REGISTERS
+        last = 0
+        idx = 0
+        while pixels:
+            if pixels & 1:
+                first = min(first, self._first[idx])
+                last = max(last, self._last[idx])
+            pixels >>= 1
+            idx += 1
+        if first > last:
+            return
+
+        self._bank[1] = frame
+        saved = pwm[first]
+        pwm[first] = _COLOR_OFFSET + first
+        with self._device as i2c:
+            i2c.write(self._bank)
+            i2c.write(pwm, start=first, end=last + 2)
+        pwm[first] = saved
+
+    def _write_config(self, register, value):
+        # Write one of the IS31FL3731's configuration registers.
+        self._bank[1] = _CONFIG_BANK
+        self._register[0] = register
+        self._register[1] = value
+        with self._device as i2c:
+            i2c.write(self._bank)
+            i2c.write(self._register)
+
+    def _select(self, frame):
+        # Show a frame.
+        self._write_config(_FRAME_REGISTER, frame)
+        self._shown = frame
+
+    def _show_buffer(self):
+        # Go back to showing the frame buffer from a live frame, sending
+        # any pixels that were left to a spare frame to show.
+        self._dirty |= self._deferred
+        if self._dirty:
+            self.show()
+        elif self._shown != self._front:
+            self._select(self._front)
+
+    def sleep(self, asleep):
+        self._asleep = asleep
+        self._write_config(_SHUTDOWN_REGISTER, 0 if asleep else 1)
+
+    def spare_frames(self):
+        return range(self._live, NUM_FRAMES)
+
+    def write_frame(self, frame, buffer):
+        if frame not in self.spare_frames():
+            raise ValueError("Frame out of range")
+        if self._scratch is None:
+            self._scratch = bytearray(1 + _PWM_REGISTERS)
+        # The frame gets the brightness and gamma in use when it's
+        # written, and keeps them if they change later.
+        scratch = self._scratch
+        offsets = self._offsets
+        lut = self._lut
+        for i in range(NUM_PIXELS * 3):
+            scratch[offsets[i] + 1] = buffer[i] if lut is None else lut[buffer[i]]
+        self._upload(frame, scratch, _ALL_PIXELS)
+
+    def set_pixels(self, buffer, frame=None):
+        if frame is None:
+            super().set_pixels(buffer)
+            return
+        # The spare frame already has these colours, so show it and leave
+        # the live frames to catch up on the next show() with a change.
+        if frame not in self.spare_frames():
+            raise ValueError("Frame out of range")
+        self._buffer[:] = buffer
+        self._deferred = _ALL_PIXELS
+        self._dirty = 0
+        self._select(frame)
+
+    def show_frame(self, frame):
+        # Show a spare frame. It stays on until the next show() that has
+        # something new to draw, which goes back to the frame buffer.
+        if frame not in self.spare_frames():
+            raise ValueError("Frame out of range")
+        self._select(frame)
+
+    def release_frame(self, frame):
+        if self._shown == frame:
+            self._show_buffer()
+
+    def play_frames(self, first, count, delay, loops=0):
+        spare = self.spare_frames()
+        if count < 1 or first not in spare or first + count - 1 not in spare:
+            raise ValueError("Frame out of range")
+        # 8 frames and 64 delay steps are written as 0.
+        steps = min(max(round(delay * 1000 / _FRAME_DELAY_MS), 1), 64)
+        self._write_config(_AUTOPLAY1_REGISTER, (min(loops, 7) << 4) | (count & 0x07))
+        self._write_config(_AUTOPLAY2_REGISTER, steps & 0x3F)
+        self._write_config(_MODE_REGISTER, _AUTOPLAY_MODE | first)
+
+    def set_breath(self, fade_in=None, fade_out=None, off_time=0.0):
+        if fade_in is None:
+            self._write_config(_BREATH2_REGISTER, 0)
+            return
+        if fade_out is None:
+            fade_out = fade_in
+        fade_in = _power_of_two(fade_in * 1000, _FADE_MS)
+        fade_out = _power_of_two(fade_out * 1000, _FADE_MS)
+        off_time = _power_of_two(off_time * 10000, _OFF_TENTHS_MS)
+        self._write_config(_BREATH1_REGISTER, (fade_out << 4) | fade_in)
+        self._write_config(_BREATH2_REGISTER, _BREATH_ENABLE | off_time)
 
-    def set_pixel(self, idx, r, g, b):
-        self._pixels.pixelrgb(idx % 4, idx // 4, r, g, b)
+    def stop_frames(self):
+        # Back in picture mode, show the frame buffer, whichever frame
+        # was showing before the frames were played.
+        self._write_config(_MODE_REGISTER, _PICTURE_MODE)
+        self._write_config(_BREATH2_REGISTER, 0)
+        self._show_buffer()
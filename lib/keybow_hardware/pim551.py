@@ -1,6 +1,5 @@
 import board
 import busio
-from digitalio import DigitalInOut, Direction
 
 from .switches.tca9555 import TCA9555 as Switches
 from .display.dotstar import Dotstar as Display
@@ -17,21 +16,53 @@ _ROTATED = {
     12: 15, 13: 11, 14: 7, 15: 3,
 }
 
+def _nibble_tables():
+    # Lookup tables translating each nibble of the TCA9555 switch mask
+    # into the matching key bits, so read_mask() can remap all 16 switches
+    # with four lookups instead of a per-key loop.
+    tables = []
+    for shift in range(0, NUM_KEYS, 4):
+        table = []
+        for nibble in range(16):
+            mask = 0
+            for key, switch in _ROTATED.items():
+                if (nibble << shift) & (1 << switch):
+                    mask |= 1 << key
+            table.append(mask)
+        tables.append(tuple(table))
+    return tables
+
+_T0, _T1, _T2, _T3 = _nibble_tables()
+
 class PIM551(Keybow):
-    def __init__(self):
+    """
+    Pimoroni Pico RGB Keypad Base
+
+    :param interrupt_pin: optional pin wired to the TCA9555's INT output,
+        so the switches are only read over I2C when one of them changes
+    :param baudrate: SPI clock rate in Hz for the LEDs
+    """
+    def __init__(self, interrupt_pin=None, baudrate=4000000):
         self._i2c = busio.I2C(board.GP5, board.GP4)
-        self._switches = Switches(self._i2c, NUM_KEYS)
-        self._display = Display(board.GP18, board.GP19, NUM_KEYS)
-        self._cs = DigitalInOut(board.GP17)
-        self._cs.direction = Direction.OUTPUT
-        self._cs.value = 1
+        self._switches = Switches(self._i2c, NUM_KEYS, interrupt=interrupt_pin)
+        # https://github.com/pimoroni/pimoroni-pico/blob/main/libraries/pico_rgb_keypad/pico_rgb_keypad.cpp#L20-L45
+        # code above sets CS only for the time of updating LEDs, so the
+        # display does the same, once per frame
+        self._display = Display(board.GP18, board.GP19, NUM_KEYS, cs=board.GP17, baudrate=baudrate)
 
     def set_pixel(self, idx, r, g, b):
-        # https://github.com/pimoroni/pimoroni-pico/blob/main/libraries/pico_rgb_keypad/pico_rgb_keypad.cpp#L20-L45
-        # code above sets CS only for the time of updating LEDs, so let's do the same
-        self._cs.value = 0
         super().set_pixel(_ROTATED[idx], r, g, b)
-        self._cs.value = 1
+
+    def pixel_buffer(self, buffer):
+        pixels = bytearray(len(buffer))
+        for idx in range(NUM_KEYS):
+            i = _ROTATED[idx] * 3
+            pixels[i:i + 3] = buffer[idx * 3:idx * 3 + 3]
+        return pixels
 
     def switch_state(self, idx):
         return super().switch_state(_ROTATED[idx])
+
+    def read_mask(self):
+        s = super().read_mask()
+        return _T0[s & 0xF] | _T1[(s >> 4) & 0xF] | _T2[(s >> 8) & 0xF] | _T3[s >> 12]
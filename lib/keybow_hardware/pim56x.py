@@ -24,7 +24,19 @@ _PINS = [board.SW0,
         board.SW15]
 
 class PIM56X(Keybow):
-    def __init__(self):
+    """
+    Pimoroni Keybow 2040
+
+    :param use_keypad: if True, scan the switches with CircuitPython's
+        native keypad module instead of polling them from Python
+    :param double_buffer: if True, draw the LEDs into a hidden frame of
+        the IS31FL3731 and flip to it, so animations never tear
+    """
+    def __init__(self, use_keypad=False, double_buffer=False):
         self._i2c = board.I2C()
-        self._switches = Switches(_PINS)
-        self._display = Display(self._i2c)
+        if use_keypad:
+            from .switches.keypad import Keypad
+            self._switches = Keypad(_PINS)
+        else:
+            self._switches = Switches(_PINS)
+        self._display = Display(self._i2c, double_buffer=double_buffer)
@@ -1,9 +1,30 @@
 class Switches:
     """
     Abstract class providing common interface to the set of switches
+
+    Backends whose switches are already debounced, before they are read,
+    set debounced to True, so that keys don't debounce them again.
     """
+    debounced = False
+
     def num_switches(self):
         raise NotImplementedError
 
     def switch_state(self, idx):
         raise NotImplementedError
+
+    def update(self):
+        # Refresh any switch state cached by the backend. Called once per
+        # scan, before switch_state() is queried for each switch.
+        pass
+
+    def read_mask(self):
+        # Returns the state of every switch as one integer, with bit n
+        # set if switch n is pressed. Backends that can read all of their
+        # switches at once should override this.
+        self.update()
+        mask = 0
+        for idx in range(self.num_switches()):
+            if self.switch_state(idx):
+                mask |= 1 << idx
+        return mask
@@ -17,3 +17,12 @@ class GPIO(Switches):
 
     def switch_state(self, idx):
         return not self._switches[idx].value
+
+    def read_mask(self):
+        mask = 0
+        bit = 1
+        for switch in self._switches:
+            if not switch.value:
+                mask |= bit
+            bit <<= 1
+        return mask
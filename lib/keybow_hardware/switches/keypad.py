@@ -0,0 +1,56 @@
+import keypad
+
+from . import Switches
+
+class Keypad(Switches):
+    """
+    Switches connected directly to GPIO, scanned and debounced in the
+    background by CircuitPython's native keypad module
+
+    :param pins: pins the switches are connected to, pulled up and
+        reading low when pressed
+    :param interval: scan interval in seconds, which also sets the
+        debounce time
+    """
+    debounced = True
+
+    def __init__(self, pins, interval=0.02):
+        self._keys = keypad.Keys(pins, value_when_pressed=False, pull=True, interval=interval)
+        self._count = len(pins)
+        self._event = keypad.Event()
+        self._state = 0
+        self._latched = 0
+
+    def num_switches(self):
+        return self._count
+
+    def update(self):
+        # Drain the event queue into the state mask. Presses are also
+        # latched for read_mask(), so a press and release that both land
+        # between two scans still shows up there as a press.
+        events = self._keys.events
+        if events.overflowed:
+            # Events were dropped, so start over from a known state:
+            # reset() queues a fresh press for every key still held.
+            events.clear()
+            events.overflowed = False
+            self._state = 0
+            self._keys.reset()
+
+        event = self._event
+        while events.get_into(event):
+            bit = 1 << event.key_number
+            if event.pressed:
+                self._state |= bit
+                self._latched |= bit
+            else:
+                self._state &= ~bit
+
+    def switch_state(self, idx):
+        return bool(self._state & (1 << idx))
+
+    def read_mask(self):
+        self.update()
+        mask = self._state | self._latched
+        self._latched = 0
+        return mask
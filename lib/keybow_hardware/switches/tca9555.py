@@ -1,22 +1,81 @@
+from digitalio import DigitalInOut, Direction, Pull
+
 from . import Switches
 
+_ADDRESS = 0x20
+_INPUT_PORT_0 = 0x00
+
 class TCA9555(Switches):
     """
     Switches connected via TCA9555 IO expander on i2c
+
+    :param i2c: i2c bus the expander is connected to
+    :param count: number of switches (up to 16)
+    :param snapshot: if True, both input ports are read in one go and
+        switch_state() answers from that snapshot, taking a new one when
+        asked about a switch it has already answered for, so a scan of
+        every switch costs one read. Otherwise every switch_state() call
+        reads the expander
+    :param interrupt: optional pin wired to the expander's INT output. If
+        given, the expander is only read while INT is asserted (low), and
+        the last snapshot is reused the rest of the time
     """
-    def __init__(self, i2c, count):
+    def __init__(self, i2c, count, snapshot=True, interrupt=None):
         self._count = count
         self._i2c = i2c
+        self._snapshot = snapshot
+        self._buffer = bytearray(2)
+        self._state = 0xFFFF # all inputs high, nothing pressed
+        self._all = (1 << count) - 1
+        self._interrupt = None
+        self._valid = False
+        self._queried = 0 # switches answered for from the snapshot
+        if interrupt is not None:
+            self._interrupt = DigitalInOut(interrupt)
+            self._interrupt.direction = Direction.INPUT
+            self._interrupt.pull = Pull.UP
 
     def num_switches(self):
         return self._count
 
-    def switch_state(self, idx):
-        buffer = bytearray(self._count // 8)
-        buffer[0] = 0x0
+    def _read(self):
+        # Read both input ports in a single transaction, returning them
+        # as one 16 bit value (bit set = input high = switch released).
+        buffer = self._buffer
+        buffer[0] = _INPUT_PORT_0
         while not self._i2c.try_lock():
             pass
-        self._i2c.writeto_then_readfrom(0x20, buffer, buffer, out_end=1)
-        self._i2c.unlock()
-        b = buffer[0] | buffer[1] << 8 # up to 16 buttons supported now
-        return not (1 << idx) & b
+        try:
+            self._i2c.writeto_then_readfrom(_ADDRESS, buffer, buffer, out_end=1)
+        finally:
+            self._i2c.unlock()
+        return buffer[0] | buffer[1] << 8 # up to 16 buttons supported now
+
+    def _refresh(self):
+        # INT is asserted when any input differs from the last value read
+        # and is cleared by reading the ports, so while it is high the
+        # snapshot is still current and the bus can be left alone.
+        self._queried = 0
+        if self._valid and self._interrupt is not None and self._interrupt.value:
+            return
+        self._state = self._read()
+        self._valid = True
+
+    def update(self):
+        if self._snapshot:
+            self._refresh()
+
+    def switch_state(self, idx):
+        bit = 1 << idx
+        if not self._snapshot:
+            return not bit & self._read()
+        if not self._valid or self._queried & bit:
+            self._refresh()
+        self._queried |= bit
+        return not bit & self._state
+
+    def read_mask(self):
+        # Inputs read low when pressed, so invert the ports to get a mask
+        # with a bit set for each pressed switch.
+        self._refresh()
+        return ~self._state & self._all